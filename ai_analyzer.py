@@ -1,6 +1,25 @@
 import json
 import random
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
+from knowledge_graph import summarize_graph
+
+CREDIT_FACTORS = {"AAA": 1.0, "AA": 0.9, "A": 0.8, "BBB": 0.7}
+
+def financial_health_factors(company_data: Dict[str, Any]) -> Tuple[float, float]:
+    """返回财务健康度模拟所用的规模系数与信用系数"""
+    scale_factor = 1.0 if company_data.get("scale") == "大型企业" else 0.7
+    credit_factor = CREDIT_FACTORS.get(company_data.get("credit_rating", "BBB"), 0.7)
+    return scale_factor, credit_factor
+
+def compute_financial_health(scale_factor, credit_factor) -> Dict[str, Any]:
+    """按规模系数与信用系数计算各项财务健康度（支持标量或NumPy数组）"""
+    return {
+        "solvency": 0.6 + 0.3 * scale_factor * credit_factor,  # 偿债能力
+        "profitability": 0.5 + 0.4 * scale_factor,  # 盈利能力
+        "operation": 0.7 + 0.2 * scale_factor,  # 运营能力
+        "growth": 0.6 + 0.3 * credit_factor,  # 成长能力
+        "cash_flow": 0.65 + 0.25 * scale_factor  # 现金流
+    }
 
 class AIAnalyzer:
     def __init__(self):
@@ -38,7 +57,7 @@ class AIAnalyzer:
         core_risks = self._identify_core_risks(company_data)
         
         # 评估财务健康度
-        financial_health = self._assess_financial_health(company_data)
+        financial_health = self.assess_financial_health(company_data)
         
         # 生成信贷建议
         credit_suggestions = self._generate_credit_suggestions(company_data, industry_analysis, core_risks)
@@ -58,6 +77,7 @@ class AIAnalyzer:
         industry = company_data.get("industry", "相关")
         scale = company_data.get("scale", "")
         
+        summary = summarize_graph(graph_data)
         positions = ["领先", "重要", "关键", "核心"]
         strengths = ["技术优势", "市场优势", "品牌优势", "供应链优势"]
         
@@ -65,8 +85,8 @@ class AIAnalyzer:
         {company_name}作为{industry}行业的{scale}企业，在产业链中处于{random.choice(positions)}位置。
         企业凭借其在{random.choice(strengths)}方面的积累，建立了较为完善的产业生态。
         
-        从知识图谱分析来看，企业拥有{len([n for n in graph_data['nodes'] if n['group'] == 'company'])}家关联企业，
-        {len([e for e in graph_data['edges'] if 'supply' in e.get('title', '')])}条供应链关系，
+        从知识图谱分析来看，企业拥有{summary['group_counts'].get('company', 0)}家关联企业，
+        {summary['supply_chain_edges']}条供应链关系，
         显示出较强的产业整合能力。
         """
         
@@ -91,20 +111,14 @@ class AIAnalyzer:
         # 返回前3-5个主要风险
         return random.sample(all_risks, min(4, len(all_risks)))
     
-    def _assess_financial_health(self, company_data: Dict[str, Any]) -> Dict[str, float]:
+    def assess_financial_health(self, company_data: Dict[str, Any]) -> Dict[str, float]:
         """评估财务健康度"""
         # 基于企业数据模拟财务指标
-        scale_factor = 1.0 if company_data.get("scale") == "大型企业" else 0.7
-        credit_factor = {"AAA": 1.0, "AA": 0.9, "A": 0.8, "BBB": 0.7}.get(
-            company_data.get("credit_rating", "BBB"), 0.7
-        )
+        scale_factor, credit_factor = financial_health_factors(company_data)
         
         return {
-            "solvency": round(0.6 + 0.3 * scale_factor * credit_factor, 2),  # 偿债能力
-            "profitability": round(0.5 + 0.4 * scale_factor, 2),  # 盈利能力
-            "operation": round(0.7 + 0.2 * scale_factor, 2),  # 运营能力
-            "growth": round(0.6 + 0.3 * credit_factor, 2),  # 成长能力
-            "cash_flow": round(0.65 + 0.25 * scale_factor, 2)  # 现金流
+            field: round(value, 2)
+            for field, value in compute_financial_health(scale_factor, credit_factor).items()
         }
     
     def _analyze_supply_chain_strength(self, company_data: Dict[str, Any]) -> Dict[str, float]:
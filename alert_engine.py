@@ -0,0 +1,236 @@
+import json
+import logging
+import queue
+from collections import defaultdict, deque
+from typing import Dict, Any, List, Iterable, Iterator, Callable, Optional, Set, Tuple
+from knowledge_graph import KnowledgeGraphBuilder
+
+class KeywordIndex:
+    """Aho-Corasick 多模式匹配，一次扫描文本即可找出全部命中的关键词"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[str]] = [[]]
+
+        for keyword in set(keywords):
+            if keyword:
+                self._insert(keyword)
+        self._build_failure_links()
+
+    def _insert(self, keyword: str):
+        state = 0
+        for char in keyword:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].append(keyword)
+
+    def _build_failure_links(self):
+        pending = deque(self.goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, child in self.goto[state].items():
+                pending.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def search(self, text: str) -> Set[str]:
+        """返回文本中出现的全部关键词"""
+        found: Set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.output[state]:
+                found.update(self.output[state])
+        return found
+
+
+class AlertEngine:
+    SEVERITY_LEVELS = ["low", "medium", "high"]
+
+    def __init__(self, rules: List[Dict[str, Any]], max_hops: int = 2,
+                 hub_degree: int = 1000, max_fanout: int = 1000):
+        """
+        rules: 预警规则列表，每条规则形如
+            {"rule_id": ..., "severity": "high",
+             "event_types": [...], "keywords": [...], "entities": [...]}
+            event_types / keywords / entities 为空表示不限制该条件
+        max_hops: 事件沿知识图谱向借款人传导的最大跳数
+        hub_degree: 关联数超过该值的中间节点（如大型共同供应商）不再向外传导
+        max_fanout: 单个事件最多影响的借款人数
+        """
+        self.rules = {rule["rule_id"]: rule for rule in rules}
+        # 规则按传入顺序输出，保证预警顺序稳定
+        self.rule_order = {rule_id: pos for pos, rule_id in enumerate(self.rules)}
+        self.max_hops = max_hops
+        self.hub_degree = hub_degree
+        self.max_fanout = max_fanout
+
+        # 规则索引：按实体、事件类型、关键词定位候选规则，避免逐条扫描
+        self.entity_rules: Dict[str, Set[str]] = defaultdict(set)
+        self.type_rules: Dict[str, Set[str]] = defaultdict(set)
+        self.keyword_rules: Dict[str, Set[str]] = defaultdict(set)
+        self.unindexed_rules: Set[str] = set()
+        for rule_id, rule in self.rules.items():
+            if rule.get("entities"):
+                for entity in rule["entities"]:
+                    self.entity_rules[entity].add(rule_id)
+            elif rule.get("keywords"):
+                for keyword in rule["keywords"]:
+                    self.keyword_rules[keyword].add(rule_id)
+            elif rule.get("event_types"):
+                for event_type in rule["event_types"]:
+                    self.type_rules[event_type].add(rule_id)
+            else:
+                self.unindexed_rules.add(rule_id)
+        self.keyword_index = KeywordIndex(
+            keyword for rule in self.rules.values() for keyword in rule.get("keywords", [])
+        )
+
+        # 借款人关联图谱，由 build_watchlist 构建；只保存一跳邻接，传导在事件到达时展开
+        self.graph = None
+        self.borrowers: Set[str] = set()
+
+    def build_watchlist(self, companies: List[Dict[str, Any]]):
+        """基于借款人数据构建关联图谱"""
+        builder = KnowledgeGraphBuilder()
+        for company in companies:
+            builder.add_company_relations(company)
+        self.graph = builder.graph
+        self.borrowers = {company["name"] for company in companies}
+
+    def exposed_borrowers(self, entity: str) -> List[Tuple[str, int]]:
+        """返回事件实体可传导到的借款人及跳数
+
+        从事件实体出发做有限跳数的广度优先遍历；高管、自然人股东等人物节点按姓名建图，可能把
+        同名的不同人连在一起，因此只能作为事件实体本身向外传导，不作为中间节点；
+        关联数超过 hub_degree 的中间节点同样不再展开，命中借款人达到 max_fanout 时截断。
+        """
+        if self.graph is None or not self.graph.has_node(entity):
+            return []
+
+        exposures: List[Tuple[str, int]] = []
+        visited = {entity}
+        frontier = [entity]
+        for hops in range(self.max_hops + 1):
+            next_frontier = []
+            for node in frontier:
+                if node in self.borrowers:
+                    exposures.append((node, hops))
+                    if len(exposures) >= self.max_fanout:
+                        logging.info(f"事件实体 {entity} 影响的借款人超过 {self.max_fanout}，已截断")
+                        return exposures
+                if hops == self.max_hops:
+                    continue
+                if node != entity and not self._propagates(node):
+                    continue
+                for neighbor in self.graph.neighbors(node):
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return exposures
+
+    def _propagates(self, node: str) -> bool:
+        """中间节点是否继续传导：借款人总是传导，其他节点须为机构实体且不是枢纽"""
+        if self.graph.degree(node) > self.hub_degree:
+            return False
+        return node in self.borrowers or KnowledgeGraphBuilder.is_expandable(self.graph.nodes[node])
+
+    def match_rules(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """返回事件命中的规则"""
+        entity = event.get("entity", "")
+        event_type = event.get("type", "")
+        text = event.get("text", "")
+        keywords = self.keyword_index.search(text) if text else set()
+
+        candidates = set(self.unindexed_rules)
+        candidates |= self.entity_rules.get(entity, set())
+        candidates |= self.type_rules.get(event_type, set())
+        for keyword in keywords:
+            candidates |= self.keyword_rules[keyword]
+
+        matched = []
+        for rule_id in sorted(candidates, key=self.rule_order.__getitem__):
+            rule = self.rules[rule_id]
+            if rule.get("entities") and entity not in rule["entities"]:
+                continue
+            if rule.get("event_types") and event_type not in rule["event_types"]:
+                continue
+            if rule.get("keywords") and not keywords.intersection(rule["keywords"]):
+                continue
+            matched.append(rule)
+        return matched
+
+    def process_event(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """处理单个事件，返回受影响借款人的预警列表"""
+        # 先匹配规则，绝大多数事件不命中任何规则，无需遍历图谱
+        rules = self.match_rules(event)
+        if not rules:
+            return []
+        exposures = self.exposed_borrowers(event.get("entity", ""))
+        if not exposures:
+            return []
+
+        alerts = []
+        for rule in rules:
+            for borrower, hops in exposures:
+                alerts.append({
+                    "event_id": event.get("event_id"),
+                    "rule_id": rule["rule_id"],
+                    "severity": self._propagated_severity(rule.get("severity", "medium"), hops),
+                    "borrower": borrower,
+                    "entity": event.get("entity"),
+                    "hops": hops,
+                    "event_type": event.get("type"),
+                    "timestamp": event.get("timestamp")
+                })
+        return alerts
+
+    def _propagated_severity(self, severity: str, hops: int) -> str:
+        """预警每向外传导一跳，严重程度降低一级"""
+        level = self.SEVERITY_LEVELS.index(severity) if severity in self.SEVERITY_LEVELS else 1
+        return self.SEVERITY_LEVELS[max(level - hops, 0)]
+
+    def run(self, events: Iterable[Dict[str, Any]],
+            on_alert: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[Dict[str, Any]]:
+        """持续消费事件流并逐条产出预警"""
+        for event in events:
+            for alert in self.process_event(event):
+                if on_alert:
+                    on_alert(alert)
+                yield alert
+
+
+def read_event_file(path: str) -> Iterator[Dict[str, Any]]:
+    """从 JSON Lines 文件逐行读取事件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"事件文件第 {line_no} 行格式错误，已跳过")
+
+
+def read_event_queue(event_queue: "queue.Queue", timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """从队列读取事件，收到 None 或等待超时后结束（用作消息队列的本地替身）"""
+    while True:
+        try:
+            event = event_queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        if event is None:
+            return
+        yield event
@@ -2,9 +2,13 @@ import streamlit as st
 import pandas as pd
 import json
 import time
-from knowledge_graph import KnowledgeGraphBuilder
+import logging
+from knowledge_graph import KnowledgeGraphBuilder, summarize_graph
 from ai_analyzer import AIAnalyzer
 from data_processor import DataProcessor
+from similarity_search import SimilarCompanySearch
+from history_store import CompanyHistoryStore
+from portfolio_analyzer import PortfolioAnalyzer
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -37,11 +41,25 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def load_similarity_search():
+    """构建同类企业检索索引（跨会话与页面重跑缓存，仅构建一次）"""
+    similarity_search = SimilarCompanySearch()
+    similarity_search.build_index(DataProcessor().get_portfolio_data())
+    return similarity_search
+
+@st.cache_resource
+def load_history_store():
+    """打开企业快照库（跨会话与页面重跑共享同一连接）"""
+    return CompanyHistoryStore()
+
 class EnterpriseMirrorApp:
     def __init__(self):
         self.data_processor = DataProcessor()
         self.graph_builder = KnowledgeGraphBuilder()
         self.ai_analyzer = AIAnalyzer()
+        self.history_store = load_history_store()
+        self.portfolio_analyzer = PortfolioAnalyzer()
         
     def render_sidebar(self):
         """渲染侧边栏"""
@@ -87,24 +105,95 @@ class EnterpriseMirrorApp:
             risk_color = {"high": "🔴", "medium": "🟡", "low": "🟢"}
             st.metric("风险等级", f"{risk_color[risk_level]} {risk_level.upper()}")
     
+    def render_portfolio_concentration(self):
+        """渲染借款人组合关联方集中度"""
+        st.subheader("📊 组合关联方集中度")
+        
+        result = self.portfolio_analyzer.analyze_concentration(self.data_processor.get_portfolio_data())
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("借款人数", result["borrower_count"])
+        with col2:
+            st.metric("关联方数", result["counterparty_count"])
+        with col3:
+            st.metric("关联方集中度(HHI)", f"{result['hhi']:.4f}")
+        
+        if result["top_counterparties"]:
+            st.markdown("**共同关联方（按敞口排序）**")
+            st.dataframe(pd.DataFrame(result["top_counterparties"]).rename(columns={
+                "name": "关联方", "borrowers": "借款人数", "exposure": "敞口", "share": "敞口占比"
+            }), use_container_width=True)
+        else:
+            st.info("暂无被多个借款人共同依赖的关联方")
+        
+        if result["top_overlapping_borrowers"]:
+            st.markdown("**关联重叠度最高的借款人**")
+            st.dataframe(pd.DataFrame(result["top_overlapping_borrowers"]).rename(columns={
+                "name": "借款人", "exposure": "敞口", "overlap_exposure": "重叠敞口", "overlap_ratio": "重叠占比"
+            }), use_container_width=True)
+    
+    def render_rating_history(self, company_name):
+        """渲染信用评级与风险等级变化趋势"""
+        rating_history = self.history_store.get_field_history(company_name, "credit_rating")
+        risk_history = self.history_store.get_field_history(company_name, "risk_level")
+        if len(rating_history) <= 1 and len(risk_history) <= 1:
+            return
+        
+        with st.expander("🕒 评级与风险变化趋势"):
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=[item["timestamp"] for item in rating_history],
+                y=[item["value"] for item in rating_history],
+                mode="lines+markers",
+                line_shape="hv",
+                name="信用评级"
+            ))
+            fig.add_trace(go.Scatter(
+                x=[item["timestamp"] for item in risk_history],
+                y=[item["value"] for item in risk_history],
+                mode="lines+markers",
+                line_shape="hv",
+                name="风险等级",
+                yaxis="y2"
+            ))
+            fig.update_layout(
+                yaxis=dict(title="信用评级"),
+                yaxis2=dict(title="风险等级", overlaying="y", side="right"),
+                height=300
+            )
+            st.plotly_chart(fig, use_container_width=True)
+    
+    def render_similar_companies(self, company_data):
+        """渲染同类企业对标（企业数据不完整时）"""
+        st.subheader("🧭 同类企业对标")
+        
+        peers = load_similarity_search().search(company_data, top_k=5)
+        if peers:
+            st.dataframe(pd.DataFrame(peers).rename(columns={"name": "企业名称", "similarity": "相似度"}),
+                         use_container_width=True)
+        else:
+            st.info("暂无可对标的企业")
+    
     def render_knowledge_graph(self, graph_data, company_name):
         """渲染知识图谱"""
         st.subheader("🔗 产业链知识图谱")
         
-        # 使用PyVis生成交互式图谱
+        # 以紧凑格式直接生成交互式图谱，避免经由PyVis二次复制
         graph_html = self.graph_builder.create_interactive_graph(graph_data, company_name)
         
         # 在Streamlit中显示图谱
         st.components.v1.html(graph_html, height=600, scrolling=True)
         
         # 图谱统计信息
+        summary = summarize_graph(graph_data)
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("关联企业", len([n for n in graph_data['nodes'] if n['group'] == 'company']))
+            st.metric("关联企业", summary["group_counts"].get("company", 0))
         with col2:
-            st.metric("关键人物", len([n for n in graph_data['nodes'] if n['group'] == 'person']))
+            st.metric("关键人物", summary["group_counts"].get("person", 0))
         with col3:
-            st.metric("产业链关系", len([e for e in graph_data['edges'] if e.get('type') == 'supply_chain']))
+            st.metric("产业链关系", summary["supply_chain_edges"])
     
     def render_ai_analysis(self, company_data, graph_data):
         """渲染AI分析报告"""
@@ -204,6 +293,10 @@ class EnterpriseMirrorApp:
         # 渲染侧边栏并获取参数
         company_name, industry, analysis_depth = self.render_sidebar()
         
+        # 组合集中度按钮
+        if st.sidebar.button("📊 组合集中度分析"):
+            self.render_portfolio_concentration()
+        
         # 分析按钮
         if st.sidebar.button("🚀 开始智能分析", type="primary"):
             with st.spinner("正在获取企业数据并构建知识图谱..."):
@@ -214,8 +307,25 @@ class EnterpriseMirrorApp:
                     # 显示企业概览
                     self.render_company_overview(company_data)
                     
+                    # 记录企业快照并展示历史变化
+                    try:
+                        self.history_store.record_snapshot(company_data)
+                        self.render_rating_history(company_name)
+                    except Exception as e:
+                        logging.warning(f"企业快照记录失败: {company_name}: {e}")
+                        st.warning("评级历史记录暂不可用")
+                    
+                    # 企业数据待更新时展示同类企业对标
+                    if company_data.get("revenue") == "数据待更新":
+                        self.render_similar_companies(company_data)
+                    
                     # 构建知识图谱
-                    graph_data = self.graph_builder.build_knowledge_graph(company_data)
+                    graph_data = self.graph_builder.build_knowledge_graph(
+                        company_data,
+                        compact=True,
+                        depth=analysis_depth,
+                        fetch_company=self.data_processor.get_company_data
+                    )
                     
                     # 创建两列布局
                     col1, col2 = st.columns([2, 1])
@@ -238,6 +348,7 @@ class EnterpriseMirrorApp:
         2. 选择行业分类（可选）
         3. 设置分析深度
         4. 点击"开始智能分析"
+        5. 点击"组合集中度分析"查看全部借款人的共同关联方
         
         **支持分析：**
         - 华为技术有限公司
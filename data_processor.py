@@ -1,7 +1,7 @@
 import json
 import pandas as pd
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, List
 import time
 
 class DataProcessor:
@@ -86,6 +86,10 @@ class DataProcessor:
             # 返回通用模板数据
             return self._generate_generic_company_data(company_name)
     
+    def get_portfolio_data(self) -> List[Dict[str, Any]]:
+        """获取已入库借款人的企业数据（模拟实现）"""
+        return list(self.mock_data.values())
+    
     def _generate_generic_company_data(self, company_name: str) -> Dict[str, Any]:
         """为未知企业生成通用数据模板"""
         return {
@@ -0,0 +1,212 @@
+import copy
+import json
+import sqlite3
+import threading
+import zlib
+from datetime import date, datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+TimeLike = Union[str, date, datetime]
+
+class CompanyHistoryStore:
+    def __init__(self, db_path: str = "company_history.db", keyframe_interval: int = 16):
+        """
+        db_path: SQLite 数据库文件路径
+        keyframe_interval: 每隔多少个版本保存一次完整快照，其余版本只保存相对上一版本的增量
+        """
+        self.keyframe_interval = keyframe_interval
+        # 同一实例可能被多个会话线程共享，事务内的多条语句须串行执行
+        self._lock = threading.RLock()
+        # 自动提交模式，写入时显式开启事务
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                company TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                ts TEXT NOT NULL,
+                is_keyframe INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                PRIMARY KEY (company, version)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_ts ON snapshots (company, ts)")
+        # 各企业最新版本缓存：company -> (version, ts, snapshot)；使用前与数据库中的最新版本核对
+        self._latest: Dict[str, Tuple[int, str, Dict[str, Any]]] = {}
+
+    def record_snapshot(self, company_data: Dict[str, Any], timestamp: Optional[TimeLike] = None) -> Optional[int]:
+        """记录企业快照，返回新版本号；与上一版本相同时不写入并返回None
+
+        读取最新版本与写入在同一个 IMMEDIATE 事务内完成，多个实例（或进程）写同一数据库文件时
+        版本号不会冲突，增量也总是基于真正的最新版本计算。
+        """
+        company_name = company_data["name"]
+        ts = self._format_time(timestamp or datetime.now())
+
+        with self._lock:
+            return self._record_locked(company_name, company_data, ts)
+
+    def _record_locked(self, company_name: str, company_data: Dict[str, Any], ts: str) -> Optional[int]:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            latest = self._get_latest(company_name)
+            if latest is None:
+                version, payload, is_keyframe = 1, company_data, True
+            else:
+                prev_version, prev_ts, prev_snapshot = latest
+                if ts < prev_ts:
+                    raise ValueError(f"快照时间 {ts} 早于最新版本时间 {prev_ts}")
+                delta = self._diff(prev_snapshot, company_data)
+                if not delta["set"] and not delta["unset"]:
+                    self.conn.execute("ROLLBACK")
+                    return None
+                version = prev_version + 1
+                is_keyframe = (version - 1) % self.keyframe_interval == 0
+                payload = company_data if is_keyframe else delta
+
+            self.conn.execute(
+                "INSERT INTO snapshots (company, version, ts, is_keyframe, payload) VALUES (?, ?, ?, ?, ?)",
+                (company_name, version, ts, int(is_keyframe), self._encode(payload))
+            )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self._latest[company_name] = (version, ts, copy.deepcopy(company_data))
+        return version
+
+    def get_snapshot(self, company_name: str, as_of: Optional[TimeLike] = None) -> Optional[Dict[str, Any]]:
+        """查询企业在指定时间点（默认当前）生效的快照"""
+        as_of = as_of or datetime.now()
+        history = self.get_history(company_name, start=as_of, end=as_of)
+        return history[0]["snapshot"] if history else None
+
+    def get_history(self, company_name: str, start: Optional[TimeLike] = None,
+                    end: Optional[TimeLike] = None) -> List[Dict[str, Any]]:
+        """查询时间区间内的全部版本
+
+        返回按时间排序的 {"version", "timestamp", "snapshot"} 列表；
+        指定 start 时，第一项为 start 时刻生效的版本（其时间可能早于 start）。
+        """
+        with self._lock:
+            start_ts = self._format_time(start) if start is not None else None
+            end_ts = self._format_time(end) if end is not None else None
+
+            effective = self._effective_version(company_name, start_ts) if start_ts else 1
+            if effective is None:
+                effective = 1
+            keyframe = self.conn.execute(
+                "SELECT MAX(version) FROM snapshots WHERE company = ? AND is_keyframe = 1 AND version <= ?",
+                (company_name, effective)
+            ).fetchone()[0]
+            if keyframe is None:
+                return []
+
+            query = "SELECT version, ts, is_keyframe, payload FROM snapshots WHERE company = ? AND version >= ?"
+            params: List[Any] = [company_name, keyframe]
+            if end_ts is not None:
+                query += " AND ts <= ?"
+                params.append(end_ts)
+            query += " ORDER BY version"
+
+            history = []
+            snapshot: Dict[str, Any] = {}
+            for version, ts, is_keyframe, payload in self.conn.execute(query, params):
+                data = self._decode(payload)
+                snapshot = data if is_keyframe else self._apply(snapshot, data)
+                if version >= effective:
+                    history.append({"version": version, "timestamp": ts, "snapshot": snapshot})
+            return history
+
+    def get_field_history(self, company_name: str, field: str, start: Optional[TimeLike] = None,
+                          end: Optional[TimeLike] = None) -> List[Dict[str, Any]]:
+        """查询单个字段（如 credit_rating、risk_level）在区间内的取值变化"""
+        changes = []
+        for item in self.get_history(company_name, start, end):
+            value = item["snapshot"].get(field)
+            if not changes or changes[-1]["value"] != value:
+                changes.append({"timestamp": item["timestamp"], "value": value})
+        return changes
+
+    def close(self):
+        self.conn.close()
+
+    def _get_latest(self, company_name: str) -> Optional[Tuple[int, str, Dict[str, Any]]]:
+        """获取企业最新版本
+
+        缓存的版本号与时间和数据库一致时直接使用缓存快照，否则（如其他实例已写入新版本）从数据库重建。
+        """
+        row = self.conn.execute(
+            "SELECT version, ts FROM snapshots WHERE company = ? ORDER BY version DESC LIMIT 1",
+            (company_name,)
+        ).fetchone()
+        if row is None:
+            self._latest.pop(company_name, None)
+            return None
+
+        cached = self._latest.get(company_name)
+        if cached is None or cached[:2] != row:
+            history = self.get_history(company_name, start=row[1])
+            item = history[-1]
+            self._latest[company_name] = (item["version"], item["timestamp"], item["snapshot"])
+        return self._latest[company_name]
+
+    def _effective_version(self, company_name: str, ts: str) -> Optional[int]:
+        """返回指定时间点生效的版本号"""
+        return self.conn.execute(
+            "SELECT MAX(version) FROM snapshots WHERE company = ? AND ts <= ?", (company_name, ts)
+        ).fetchone()[0]
+
+    @staticmethod
+    def _diff(old: Dict[str, Any], new: Dict[str, Any], prefix: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """计算两个快照之间的增量，嵌套字典逐层比较，列表等其他值整体替换"""
+        delta: Dict[str, Any] = {"set": [], "unset": []}
+        for key, value in new.items():
+            path = prefix + (key,)
+            if key not in old:
+                delta["set"].append([list(path), value])
+            elif isinstance(value, dict) and isinstance(old[key], dict):
+                child = CompanyHistoryStore._diff(old[key], value, path)
+                delta["set"].extend(child["set"])
+                delta["unset"].extend(child["unset"])
+            elif old[key] != value:
+                delta["set"].append([list(path), value])
+        for key in old:
+            if key not in new:
+                delta["unset"].append(list(prefix + (key,)))
+        return delta
+
+    @staticmethod
+    def _apply(snapshot: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+        """在快照副本上应用增量，不修改原快照"""
+        result = copy.deepcopy(snapshot)
+        for path, value in delta["set"]:
+            target = result
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+        for path in delta["unset"]:
+            target = result
+            for key in path[:-1]:
+                target = target.get(key, {})
+            target.pop(path[-1], None)
+        return result
+
+    @staticmethod
+    def _encode(payload: Dict[str, Any]) -> bytes:
+        return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    @staticmethod
+    def _decode(payload: bytes) -> Dict[str, Any]:
+        return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+    @staticmethod
+    def _format_time(value: TimeLike) -> str:
+        """统一为UTC的定长 ISO 时间字符串，可直接按字典序比较
+
+        带时区的时间换算为UTC；不带时区的时间（含日期与无偏移字符串）按本地时间处理。
+        """
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
@@ -1,21 +1,87 @@
 import networkx as nx
 from pyvis.network import Network
 import json
-from typing import Dict, Any, List
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, List, Callable, Optional
+
+# 紧凑模式直接渲染 vis-network，不再经由 PyVis 复制一遍数据
+VIS_NETWORK_JS = "https://unpkg.com/vis-network@9.1.9/standalone/umd/vis-network.min.js"
+
+GRAPH_OPTIONS = {
+    "physics": {
+        "enabled": True,
+        "stabilization": {"iterations": 100}
+    },
+    "interaction": {
+        "hover": True,
+        "tooltipDelay": 200
+    },
+    "layout": {
+        "improvedLayout": True
+    }
+}
 
 class KnowledgeGraphBuilder:
-    def __init__(self):
+    # 多跳扩展时继续向外展开的节点分组（人物节点不展开）
+    EXPANDABLE_GROUPS = ("company", "shareholder", "supplier", "customer")
+    # 股东名称包含以下字样时视为机构股东，否则视为自然人
+    COMPANY_NAME_MARKERS = ("公司", "集团", "企业", "银行", "基金", "合伙", "控股", "中心",
+                            "Limited", "Ltd", "Holdings", "Inc", "Corp", "LLC", "GmbH")
+    
+    def __init__(self, max_nodes: int = 500, deadline_seconds: float = 5.0, max_workers: int = 8):
+        """
+        max_nodes: 多跳扩展时图谱的节点预算
+        deadline_seconds: 多跳扩展的总耗时上限（秒）
+        max_workers: 并行获取关联实体数据的线程数
+        """
         self.graph = nx.Graph()
+        self.max_nodes = max_nodes
+        self.deadline_seconds = deadline_seconds
+        self.max_workers = max_workers
     
-    def build_knowledge_graph(self, company_data: Dict[str, Any]) -> Dict[str, Any]:
-        """构建企业知识图谱"""
+    def build_knowledge_graph(self, company_data: Dict[str, Any], compact: bool = False, depth: int = 1,
+                              fetch_company: Optional[Callable[[str], Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """构建企业知识图谱
+
+        compact=True 时返回列式紧凑格式（见 _convert_to_compact_format），
+        适用于大图谱的渲染；默认返回逐节点/逐边的字典格式。
+        depth>1 且提供 fetch_company 时，按广度优先向外扩展 depth-1 跳关联实体。
+        """
         self.graph.clear()
         
         company_name = company_data["name"]
         
-        # 添加中心企业节点
-        self._add_company_node(company_name, company_data)
+        # 添加中心企业节点及直接关联关系
+        self.add_company_relations(company_data)
+        
+        if depth > 1 and fetch_company is not None:
+            self._expand_neighbors(company_name, depth - 1, fetch_company)
         
+        if compact:
+            return self._convert_to_compact_format()
+        return self._convert_to_vis_format()
+    
+    def add_company_relations(self, company_data: Dict[str, Any]):
+        """在现有图谱上追加一家企业及其直接关联关系，不清空已有节点"""
+        company_name = company_data["name"]
+        self._add_company_node(company_name, company_data)
+        self._add_relations(company_name, company_data)
+    
+    @classmethod
+    def is_expandable(cls, node_data: Dict[str, Any]) -> bool:
+        """节点是否为可继续向外扩展的机构实体（人物及自然人股东不扩展）"""
+        return (node_data.get("group") in cls.EXPANDABLE_GROUPS
+                and node_data.get("entity_type", "company") == "company")
+    
+    @classmethod
+    def _looks_like_company(cls, name: str) -> bool:
+        return any(marker in name for marker in cls.COMPANY_NAME_MARKERS)
+    
+    def _add_relations(self, company_name: str, company_data: Dict[str, Any]):
+        """添加企业的股东、高管、子公司及供应链关系"""
         # 添加股东关系
         for shareholder in company_data.get("shareholders", []):
             self._add_shareholder_relation(company_name, shareholder)
@@ -30,8 +96,78 @@ class KnowledgeGraphBuilder:
         
         # 添加上下游供应链关系
         self._add_supply_chain_relations(company_name, company_data.get("supply_chain", {}))
+    
+    def _expand_neighbors(self, company_name: str, hops: int,
+                          fetch_company: Callable[[str], Dict[str, Any]]):
+        """广度优先多跳扩展
+
+        每一层的待扩展实体并行获取，已获取的实体不再重复请求；
+        节点数达到 max_nodes 或超过 deadline_seconds 时停止扩展，保留已合并的部分。
+        """
+        deadline = time.monotonic() + self.deadline_seconds
+        fetched = {company_name}
+        frontier = self._expandable_neighbors(company_name, fetched)
         
-        return self._convert_to_vis_format()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for _ in range(hops):
+                if not frontier or self.graph.number_of_nodes() >= self.max_nodes:
+                    break
+                fetched.update(frontier)
+                
+                futures = {executor.submit(fetch_company, name): name for name in frontier}
+                next_frontier = []
+                pending = set(futures)
+                while pending and self.graph.number_of_nodes() < self.max_nodes:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = futures[future]
+                        try:
+                            entity_data = future.result()
+                        except Exception as e:
+                            logging.warning(f"获取关联实体数据失败: {name}: {e}")
+                            continue
+                        if entity_data and self._merge_entity(name, entity_data):
+                            next_frontier.extend(self._expandable_neighbors(name, fetched))
+                
+                for future in pending:
+                    future.cancel()
+                if pending:
+                    logging.info(f"图谱扩展达到节点预算或超时，跳过 {len(pending)} 个实体")
+                    break
+                
+                frontier = list(dict.fromkeys(next_frontier))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _expandable_neighbors(self, name: str, fetched: set) -> List[str]:
+        """返回尚未获取、可继续扩展的相邻实体"""
+        return [
+            neighbor for neighbor in self.graph.neighbors(name)
+            if neighbor not in fetched and self.is_expandable(self.graph.nodes[neighbor])
+        ]
+    
+    def _merge_entity(self, name: str, entity_data: Dict[str, Any]) -> bool:
+        """将关联实体的关系合并进图谱，已有节点和边保留原属性
+
+        合并后节点数超出预算时放弃该实体，返回是否已合并。
+        """
+        scratch = KnowledgeGraphBuilder()
+        scratch._add_relations(name, entity_data)
+        
+        new_nodes = [node for node in scratch.graph.nodes if not self.graph.has_node(node)]
+        if self.graph.number_of_nodes() + len(new_nodes) > self.max_nodes:
+            return False
+        
+        for node in new_nodes:
+            self.graph.add_node(node, **scratch.graph.nodes[node])
+        for source, target, edge_data in scratch.graph.edges(data=True):
+            if not self.graph.has_edge(source, target):
+                self.graph.add_edge(source, target, **edge_data)
+        return True
     
     def _add_company_node(self, company_name: str, data: Dict[str, Any]):
         """添加企业节点"""
@@ -39,12 +175,12 @@ class KnowledgeGraphBuilder:
             company_name,
             label=company_name,
             group="company",
-            title=f"""
-            企业名称: {company_name}
-            行业: {data.get('industry', '未知')}
-            规模: {data.get('scale', '未知')}
-            信用评级: {data.get('credit_rating', '未知')}
-            """,
+            title=(
+                f"企业名称: {company_name}\n"
+                f"行业: {data.get('industry', '未知')}\n"
+                f"规模: {data.get('scale', '未知')}\n"
+                f"信用评级: {data.get('credit_rating', '未知')}"
+            ),
             size=40,
             color="#1f77b4"
         )
@@ -58,6 +194,7 @@ class KnowledgeGraphBuilder:
             shareholder_name,
             label=shareholder_name,
             group="shareholder",
+            entity_type="company" if self._looks_like_company(shareholder_name) else "person",
             title=f"持股比例: {ratio}",
             size=25,
             color="#ff7f0e"
@@ -79,6 +216,7 @@ class KnowledgeGraphBuilder:
             exec_name,
             label=exec_name,
             group="person",
+            entity_type="person",
             title=f"职务: {position}",
             size=20,
             color="#2ca02c"
@@ -126,7 +264,8 @@ class KnowledgeGraphBuilder:
                 title="供应关系",
                 value=2,
                 color="#9467bd",
-                dashes=True
+                dashes=True,
+                type="supply_chain"
             )
         
         # 下游客户
@@ -144,7 +283,8 @@ class KnowledgeGraphBuilder:
                 title="客户关系", 
                 value=2,
                 color="#8c564b",
-                dashes=True
+                dashes=True,
+                type="supply_chain"
             )
     
     def _convert_to_vis_format(self) -> Dict[str, Any]:
@@ -169,31 +309,111 @@ class KnowledgeGraphBuilder:
                 "title": edge[2].get("title", ""),
                 "value": edge[2].get("value", 1),
                 "color": edge[2].get("color", "#848484"),
-                "dashes": edge[2].get("dashes", False)
+                "dashes": edge[2].get("dashes", False),
+                "type": edge[2].get("type", "")
             })
         
         return {"nodes": nodes, "edges": edges}
     
+    def _convert_to_compact_format(self) -> Dict[str, Any]:
+        """将NetworkX图转换为列式紧凑格式
+
+        - 节点/边以列数组存储，边端点用节点下标表示；
+        - 颜色、大小、分组等重复样式收敛到样式表，按下标引用；
+        - 提示文本去重后单独存放，页面仅在悬停时解析。
+        """
+        index = {}
+        labels = {}
+        node_style = []
+        node_tooltips = []
+        # 样式表与提示文本表均以字典去重编号，字典保持插入顺序即为表内下标
+        node_style_index = {}
+        edge_style_index = {}
+        string_index = {}
+        
+        for node, node_data in self.graph.nodes(data=True):
+            pos = index[node] = len(index)
+            label = node_data.get("label", node)
+            if label != node:
+                labels[pos] = label
+            
+            style = (node_data.get("group", "default"), node_data.get("size", 10), node_data.get("color", "#97C2FC"))
+            style_pos = node_style_index.get(style)
+            if style_pos is None:
+                style_pos = node_style_index[style] = len(node_style_index)
+            node_style.append(style_pos)
+            
+            title = node_data.get("title", "")
+            title_pos = string_index.get(title)
+            if title_pos is None:
+                title_pos = string_index[title] = len(string_index)
+            node_tooltips.append(title_pos)
+        
+        sources = []
+        targets = []
+        edge_style = []
+        edge_tooltips = []
+        
+        # 直接遍历邻接表，无向边只在下标较小的端点处取一次（与 edges() 的顺序一致），
+        # 省去 EdgeDataView 逐条生成三元组的开销
+        for node, neighbors in self.graph.adjacency():
+            source = index[node]
+            for neighbor, edge_data in neighbors.items():
+                target = index[neighbor]
+                if target < source:
+                    continue
+                sources.append(source)
+                targets.append(target)
+                
+                style = (
+                    edge_data.get("value", 1),
+                    edge_data.get("color", "#848484"),
+                    edge_data.get("dashes", False),
+                    edge_data.get("type", "")
+                )
+                style_pos = edge_style_index.get(style)
+                if style_pos is None:
+                    style_pos = edge_style_index[style] = len(edge_style_index)
+                edge_style.append(style_pos)
+                
+                title = edge_data.get("title", "")
+                title_pos = string_index.get(title)
+                if title_pos is None:
+                    title_pos = string_index[title] = len(string_index)
+                edge_tooltips.append(title_pos)
+        
+        return {
+            "format": "compact",
+            "ids": list(index),
+            "labels": labels,
+            "node_style": node_style,
+            "node_styles": [
+                {"group": group, "size": size, "color": color}
+                for group, size, color in node_style_index
+            ],
+            "sources": sources,
+            "targets": targets,
+            "edge_style": edge_style,
+            "edge_styles": [
+                {"value": value, "color": color, "dashes": dashes, "type": edge_type}
+                for value, color, dashes, edge_type in edge_style_index
+            ],
+            "tooltips": {
+                "strings": list(string_index),
+                "nodes": node_tooltips,
+                "edges": edge_tooltips
+            }
+        }
+    
     def create_interactive_graph(self, graph_data: Dict[str, Any], company_name: str) -> str:
         """创建交互式图谱HTML"""
+        if graph_data.get("format") == "compact":
+            return self._create_compact_graph_html(graph_data)
+        
         net = Network(height="600px", width="100%", directed=True)
         
         # 设置图谱选项
-        net.set_options("""
-        {
-            "physics": {
-                "enabled": true,
-                "stabilization": {"iterations": 100}
-            },
-            "interaction": {
-                "hover": true,
-                "tooltipDelay": 200
-            },
-            "layout": {
-                "improvedLayout": true
-            }
-        }
-        """)
+        net.set_options(json.dumps(GRAPH_OPTIONS))
         
         # 添加节点和边
         for node in graph_data["nodes"]:
@@ -218,3 +438,114 @@ class KnowledgeGraphBuilder:
         
         # 生成HTML
         return net.generate_html()
+    
+    def _create_compact_graph_html(self, graph_data: Dict[str, Any]) -> str:
+        """基于紧凑格式直接生成 vis-network 页面，提示文本在首次悬停时才解析"""
+        tooltips = graph_data["tooltips"]
+        payload = {key: value for key, value in graph_data.items() if key != "tooltips"}
+        
+        return COMPACT_GRAPH_TEMPLATE.format(
+            vis_js=VIS_NETWORK_JS,
+            payload=_dump_script_json(payload),
+            tooltips=_dump_script_json(tooltips),
+            options=json.dumps(GRAPH_OPTIONS)
+        )
+
+
+
+def summarize_graph(graph_data: Dict[str, Any]) -> Dict[str, Any]:
+    """统计图谱各分组节点数及产业链关系数，兼容字典格式与紧凑格式"""
+    group_counts = Counter()
+    if graph_data.get("format") == "compact":
+        node_styles = graph_data["node_styles"]
+        for pos, count in Counter(graph_data["node_style"]).items():
+            group_counts[node_styles[pos]["group"]] += count
+        edge_styles = graph_data["edge_styles"]
+        supply_chain_edges = sum(
+            count for pos, count in Counter(graph_data["edge_style"]).items()
+            if edge_styles[pos]["type"] == "supply_chain"
+        )
+    else:
+        group_counts.update(node["group"] for node in graph_data["nodes"])
+        supply_chain_edges = sum(1 for edge in graph_data["edges"] if edge.get("type") == "supply_chain")
+    
+    return {"group_counts": dict(group_counts), "supply_chain_edges": supply_chain_edges}
+
+
+def _dump_script_json(data: Any) -> str:
+    """序列化为可安全嵌入 <script> 标签的紧凑 JSON"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+COMPACT_GRAPH_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="{vis_js}"></script>
+<style>
+  #graph {{ width: 100%; height: 600px; }}
+  #graph-tooltip {{
+    position: absolute; display: none; pointer-events: none; white-space: pre-line;
+    background: #fff; border: 1px solid #ccc; border-radius: 3px; padding: 5px; font-size: 13px;
+  }}
+</style>
+</head>
+<body>
+<div id="graph"></div>
+<div id="graph-tooltip"></div>
+<script type="application/json" id="graph-tooltips">{tooltips}</script>
+<script>
+  var data = {payload};
+  var nodes = new Array(data.ids.length);
+  for (var i = 0; i < data.ids.length; i++) {{
+    var style = data.node_styles[data.node_style[i]];
+    nodes[i] = {{
+      id: i,
+      label: data.labels[i] !== undefined ? data.labels[i] : data.ids[i],
+      group: style.group,
+      size: style.size,
+      color: style.color
+    }};
+  }}
+  var edges = new Array(data.sources.length);
+  for (var j = 0; j < data.sources.length; j++) {{
+    var edgeStyle = data.edge_styles[data.edge_style[j]];
+    edges[j] = {{
+      id: j,
+      from: data.sources[j],
+      to: data.targets[j],
+      value: edgeStyle.value,
+      color: edgeStyle.color,
+      dashes: edgeStyle.dashes,
+      arrows: "to"
+    }};
+  }}
+  var network = new vis.Network(
+    document.getElementById("graph"),
+    {{nodes: new vis.DataSet(nodes), edges: new vis.DataSet(edges)}},
+    {options}
+  );
+
+  var tooltips = null;
+  var tooltipDiv = document.getElementById("graph-tooltip");
+  function showTooltip(kind, index, pointer) {{
+    if (tooltips === null) {{
+      tooltips = JSON.parse(document.getElementById("graph-tooltips").textContent);
+    }}
+    var text = tooltips.strings[tooltips[kind][index]];
+    if (!text) {{ return; }}
+    tooltipDiv.textContent = text;
+    tooltipDiv.style.left = (pointer.DOM.x + 10) + "px";
+    tooltipDiv.style.top = (pointer.DOM.y + 10) + "px";
+    tooltipDiv.style.display = "block";
+  }}
+  function hideTooltip() {{ tooltipDiv.style.display = "none"; }}
+  network.on("hoverNode", function (params) {{ showTooltip("nodes", params.node, params.pointer); }});
+  network.on("hoverEdge", function (params) {{ showTooltip("edges", params.edge, params.pointer); }});
+  network.on("blurNode", hideTooltip);
+  network.on("blurEdge", hideTooltip);
+  network.on("dragStart", hideTooltip);
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,143 @@
+import numpy as np
+from scipy import sparse
+from typing import Dict, Any, List, Optional
+
+class PortfolioAnalyzer:
+    def __init__(self):
+        self.borrowers: List[str] = []
+        self.counterparties: List[str] = []
+        self.matrix: Optional[sparse.csr_matrix] = None
+        self.exposures: Optional[np.ndarray] = None
+
+    def build_exposure_matrix(self, companies: List[Dict[str, Any]],
+                              exposures: Optional[Dict[str, float]] = None) -> sparse.csr_matrix:
+        """构建借款人 × 关联方的稀疏关联矩阵
+
+        行为借款人，列为供应商、客户、股东等关联方（按名称合并），
+        存在关联时取值为1。exposures 为借款人名称到敞口金额的映射；
+        未传入时每户敞口记为1，传入时映射中缺失的借款人敞口记为0。
+        """
+        counterparty_index: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+
+        self.borrowers = []
+        self.counterparties = []
+
+        for row, company in enumerate(companies):
+            self.borrowers.append(company["name"])
+            for name in self._iter_counterparties(company):
+                col = counterparty_index.get(name)
+                if col is None:
+                    col = counterparty_index[name] = len(self.counterparties)
+                    self.counterparties.append(name)
+                rows.append(row)
+                cols.append(col)
+
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float64), (rows, cols)),
+            shape=(len(self.borrowers), len(self.counterparties))
+        )
+        # 同一关联方在多个字段中重复出现时只计一次
+        matrix.data[:] = 1.0
+
+        self.matrix = matrix
+        if exposures is None:
+            self.exposures = np.ones(len(self.borrowers), dtype=np.float64)
+        else:
+            self.exposures = np.array(
+                [float(exposures.get(name, 0.0)) for name in self.borrowers], dtype=np.float64
+            )
+        return matrix
+
+    def _iter_counterparties(self, company: Dict[str, Any]):
+        """遍历企业的上游供应商、下游客户及股东名称"""
+        supply_chain = company.get("supply_chain", {})
+        yield from supply_chain.get("upstream", [])
+        yield from supply_chain.get("downstream", [])
+        for shareholder in company.get("shareholders", []):
+            yield shareholder["name"]
+
+    def analyze_concentration(self, companies: List[Dict[str, Any]],
+                              exposures: Optional[Dict[str, float]] = None,
+                              top_n: int = 10) -> Dict[str, Any]:
+        """计算组合层面的关联方集中度"""
+        matrix = self.build_exposure_matrix(companies, exposures)
+        exposure = self.exposures
+        total_exposure = float(exposure.sum())
+
+        # 每个关联方牵涉的借款人数与敞口
+        borrower_counts = np.asarray(matrix.sum(axis=0)).ravel()
+        counterparty_exposure = matrix.T @ exposure
+
+        return {
+            "borrower_count": len(self.borrowers),
+            "counterparty_count": len(self.counterparties),
+            "total_exposure": total_exposure,
+            "hhi": self._herfindahl_index(counterparty_exposure),
+            "top_counterparties": self._top_shared_counterparties(
+                borrower_counts, counterparty_exposure, total_exposure, top_n
+            ),
+            "top_overlapping_borrowers": self._top_overlapping_borrowers(
+                counterparty_exposure, total_exposure, top_n
+            )
+        }
+
+    def _herfindahl_index(self, counterparty_exposure: np.ndarray) -> float:
+        """按关联方敞口份额计算HHI（0-1，越大越集中）"""
+        total = counterparty_exposure.sum()
+        if total <= 0:
+            return 0.0
+        shares = counterparty_exposure / total
+        return round(float(np.dot(shares, shares)), 4)
+
+    def _top_shared_counterparties(self, borrower_counts: np.ndarray, counterparty_exposure: np.ndarray,
+                                   total_exposure: float, top_n: int) -> List[Dict[str, Any]]:
+        """被两户及以上借款人共同依赖、敞口最大的关联方"""
+        shared = np.flatnonzero(borrower_counts >= 2)
+        top = self._top_indices(counterparty_exposure[shared], top_n)
+
+        return [
+            {
+                "name": self.counterparties[i],
+                "borrowers": int(borrower_counts[i]),
+                "exposure": float(counterparty_exposure[i]),
+                "share": round(float(counterparty_exposure[i]) / total_exposure, 4) if total_exposure else 0.0
+            }
+            for i in shared[top]
+        ]
+
+    def _top_overlapping_borrowers(self, counterparty_exposure: np.ndarray,
+                                   total_exposure: float, top_n: int) -> List[Dict[str, Any]]:
+        """按敞口加权重叠度排序的借款人
+
+        重叠敞口 = 借款人各关联方上其他借款人的敞口之和（共享多个关联方时重复计入），
+        通过 A·(Aᵀ·e) − deg·e 求得，无需构造借款人两两共现矩阵。
+        """
+        matrix = self.matrix
+        exposure = self.exposures
+        degrees = np.diff(matrix.indptr)
+        overlap = matrix @ counterparty_exposure - degrees * exposure
+        top = self._top_indices(overlap, top_n)
+
+        return [
+            {
+                "name": self.borrowers[i],
+                "exposure": float(exposure[i]),
+                "overlap_exposure": float(overlap[i]),
+                "overlap_ratio": round(float(overlap[i]) / total_exposure, 4) if total_exposure else 0.0
+            }
+            for i in top
+            if overlap[i] > 0
+        ]
+
+    @staticmethod
+    def _top_indices(values: np.ndarray, top_n: int) -> np.ndarray:
+        """返回取值最大的 top_n 个下标（降序）"""
+        if values.size == 0 or top_n <= 0:
+            return np.array([], dtype=np.int64)
+        if values.size > top_n:
+            candidates = np.argpartition(-values, top_n - 1)[:top_n]
+        else:
+            candidates = np.arange(values.size)
+        return candidates[np.argsort(-values[candidates], kind="stable")]
@@ -0,0 +1,182 @@
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+class SimilarCompanySearch:
+    INDUSTRIES = ["科技", "制造", "金融", "消费", "医疗", "能源", "综合"]
+    SCALE_SCORES = {"大型企业": 1.0, "中型企业": 0.6, "小型企业": 0.3, "微型企业": 0.1}
+    RATING_SCORES = {"AAA": 1.0, "AA": 0.9, "A": 0.8, "BBB": 0.7, "BB": 0.5, "B": 0.3}
+    RISK_SCORES = {"low": 0.0, "medium": 0.5, "high": 1.0}
+
+    def __init__(self, exact_threshold: int = 50000, n_lists: Optional[int] = None,
+                 n_probe: int = 8, seed: int = 0):
+        """
+        exact_threshold: 企业数不超过该值时使用暴力精确检索，否则构建分区（倒排）近似索引
+        n_lists: 分区数量，默认取 sqrt(企业数)
+        n_probe: 近似检索时探查的分区数量
+        """
+        self.exact_threshold = exact_threshold
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+
+        self.names: List[str] = []
+        self.vectors: Optional[np.ndarray] = None
+        self.mean: Optional[np.ndarray] = None
+        self.std: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        self.list_offsets: Optional[np.ndarray] = None
+
+    def encode(self, company_data: Dict[str, Any]) -> np.ndarray:
+        """将单个企业数据编码为原始数值特征向量"""
+        return self.encode_batch([company_data])[0]
+
+    def encode_batch(self, companies: List[Dict[str, Any]]) -> np.ndarray:
+        """批量编码企业特征向量
+
+        逐企业只做字段读取，数值变换按列向量化完成。
+        财务健康度目前完全由规模与评级推算，与 profile 重复，待接入真实财务比率后再纳入。
+        """
+        n = len(companies)
+        industry_pos = {industry: i for i, industry in enumerate(self.INDUSTRIES)}
+
+        industry_idx = np.array(
+            [industry_pos.get(company.get("industry"), -1) for company in companies], dtype=np.int64
+        )
+        industry = np.zeros((n, len(self.INDUSTRIES)), dtype=np.float32)
+        known = industry_idx >= 0
+        industry[np.flatnonzero(known), industry_idx[known]] = 1.0
+
+        profile = np.array([
+            (
+                self.SCALE_SCORES.get(company.get("scale"), 0.6),
+                self.RATING_SCORES.get(company.get("credit_rating"), 0.7),
+                self.RISK_SCORES.get(company.get("risk_level"), 0.5),
+                company.get("establish_years", 0)
+            )
+            for company in companies
+        ], dtype=np.float32).reshape(n, 4)
+        profile[:, 3] = np.log1p(profile[:, 3])
+
+        # 图谱度数特征：各类关系数量取对数
+        degrees = np.log1p(np.array([
+            (
+                len(company.get("shareholders", [])),
+                len(company.get("executives", [])),
+                len(company.get("subsidiaries", [])),
+                len(company.get("supply_chain", {}).get("upstream", [])),
+                len(company.get("supply_chain", {}).get("downstream", []))
+            )
+            for company in companies
+        ], dtype=np.float32).reshape(n, 5))
+
+        return np.hstack([
+            industry,
+            profile,
+            degrees
+        ]).astype(np.float32)
+
+    def build_index(self, companies: List[Dict[str, Any]]):
+        """为企业列表构建相似检索索引"""
+        self.names = [company["name"] for company in companies]
+        self.centroids = None
+        self.list_offsets = None
+        if not companies:
+            self.vectors = None
+            return
+
+        raw = self.encode_batch(companies)
+
+        # 标准化后做L2归一化，内积即余弦相似度
+        self.mean = raw.mean(axis=0)
+        std = raw.std(axis=0)
+        self.std = np.where(std > 0, std, 1.0).astype(np.float32)
+        vectors = self._normalize(raw)
+
+        if len(vectors) > self.exact_threshold:
+            vectors = self._build_partitions(vectors)
+        self.vectors = vectors
+
+    def search(self, company_data: Dict[str, Any], top_k: int = 5,
+               exact: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """检索与目标企业最相似的 top_k 家企业（不含目标企业自身）"""
+        if self.vectors is None or len(self.names) == 0:
+            return []
+
+        query = self._normalize(self.encode(company_data)[None, :])[0]
+        if exact is None:
+            exact = self.centroids is None
+
+        if exact:
+            candidates = np.arange(len(self.vectors))
+            scores = self.vectors @ query
+        else:
+            candidates = self._probe_candidates(query)
+            scores = self.vectors[candidates] @ query
+
+        if len(scores) == 0:
+            return []
+
+        # 多取一个，以便剔除目标企业自身
+        k = min(top_k + 1, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for i in top:
+            name = self.names[candidates[i]]
+            if name == company_data.get("name"):
+                continue
+            results.append({"name": name, "similarity": round(float(scores[i]), 4)})
+        return results[:top_k]
+
+    def _normalize(self, raw: np.ndarray) -> np.ndarray:
+        """按索引统计量标准化并做L2归一化"""
+        vectors = (raw - self.mean) / self.std
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.where(norms > 0, norms, 1.0)).astype(np.float32)
+
+    def _build_partitions(self, vectors: np.ndarray) -> np.ndarray:
+        """用k-means划分向量空间，并按分区重排向量与企业名称"""
+        n_lists = self.n_lists or int(np.sqrt(len(vectors)))
+        self.centroids = self._train_centroids(vectors, n_lists)
+
+        assignments = self._assign(vectors, self.centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=len(self.centroids))
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.names = [self.names[i] for i in order]
+        return vectors[order]
+
+    def _train_centroids(self, vectors: np.ndarray, n_lists: int, iterations: int = 10) -> np.ndarray:
+        """在采样数据上训练k-means质心（球面k-means）"""
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(vectors), n_lists * 256)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # 空分区保留原质心
+            centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1.0), centroids)
+
+        return centroids.astype(np.float32)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        """分块计算每个向量最近的质心，控制内存占用"""
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+
+    def _probe_candidates(self, query: np.ndarray) -> np.ndarray:
+        """返回与查询最接近的 n_probe 个分区内的全部向量下标"""
+        n_probe = min(self.n_probe, len(self.centroids))
+        probes = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        return np.concatenate([
+            np.arange(self.list_offsets[p], self.list_offsets[p + 1]) for p in probes
+        ])
@@ -0,0 +1,102 @@
+import random
+
+from alert_engine import AlertEngine, KeywordIndex
+
+
+def make_borrower(name, upstream=(), shareholders=()):
+    return {
+        "name": name,
+        "shareholders": [{"name": shareholder, "ratio": "10%"} for shareholder in shareholders],
+        "supply_chain": {"upstream": list(upstream), "downstream": []},
+    }
+
+
+def test_keyword_index_matches_substring_search():
+    rng = random.Random(0)
+    for _ in range(200):
+        keywords = {"".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(8)}
+        text = "".join(rng.choice("abcd") for _ in range(30))
+        expected = {keyword for keyword in keywords if keyword in text}
+        assert KeywordIndex(keywords).search(text) == expected
+
+
+def test_keyword_index_matches_chinese_keywords():
+    index = KeywordIndex(["违约", "债券违约", "诉讼"])
+    assert index.search("某公司发生债券违约") == {"违约", "债券违约"}
+    assert index.search("经营正常") == set()
+
+
+def test_rule_with_entities_and_keywords_requires_both():
+    engine = AlertEngine([
+        {"rule_id": "supplier_default", "entities": ["供应商甲"], "keywords": ["违约"], "severity": "high"}
+    ])
+
+    def matched(entity, text):
+        return [rule["rule_id"] for rule in engine.match_rules({"entity": entity, "text": text})]
+
+    assert matched("供应商甲", "供应商甲债券违约") == ["supplier_default"]
+    assert matched("供应商甲", "供应商甲完成融资") == []
+    assert matched("供应商乙", "供应商乙债券违约") == []
+
+
+def test_matched_rules_keep_declaration_order():
+    rules = [{"rule_id": f"rule_{i}", "keywords": ["违约"], "severity": "low"} for i in range(20)]
+    engine = AlertEngine(rules)
+    matched = engine.match_rules({"entity": "任意", "text": "违约"})
+    assert [rule["rule_id"] for rule in matched] == [f"rule_{i}" for i in range(20)]
+
+
+def test_severity_decays_per_hop():
+    # 借款人甲 -> 供应商甲（1跳）；借款人乙与借款人甲共同股东控股公司（借款人乙距借款人甲2跳）
+    engine = AlertEngine([{"rule_id": "litigation", "event_types": ["litigation"], "severity": "high"}])
+    engine.build_watchlist([
+        make_borrower("借款人甲", upstream=["供应商甲"], shareholders=["共同股东控股公司"]),
+        make_borrower("借款人乙", shareholders=["共同股东控股公司"]),
+    ])
+
+    def severities(entity):
+        alerts = engine.process_event({"event_id": 1, "entity": entity, "type": "litigation"})
+        return {(alert["borrower"], alert["hops"]): alert["severity"] for alert in alerts}
+
+    assert severities("借款人甲") == {("借款人甲", 0): "high", ("借款人乙", 2): "low"}
+    assert severities("供应商甲") == {("借款人甲", 1): "medium"}
+
+
+def test_hub_nodes_do_not_propagate_and_fanout_is_capped():
+    borrowers = [make_borrower(f"借款人{i}", upstream=["共同供应商"]) for i in range(10)]
+    engine = AlertEngine(
+        [{"rule_id": "litigation", "event_types": ["litigation"], "severity": "high"}],
+        hub_degree=5, max_fanout=4
+    )
+    engine.build_watchlist(borrowers)
+
+    # 借款人0 的诉讼不经由共同供应商（枢纽节点）传导给其他借款人
+    assert engine.exposed_borrowers("借款人0") == [("借款人0", 0)]
+    # 共同供应商自身出事时直接影响的借款人按 max_fanout 截断，且顺序固定
+    assert engine.exposed_borrowers("共同供应商") == [(f"借款人{i}", 1) for i in range(4)]
+
+
+def test_person_nodes_do_not_link_unrelated_borrowers():
+    # 两家借款人各有一位同名高管/自然人股东“张伟”，不应因此互相传导
+    engine = AlertEngine([{"rule_id": "litigation", "event_types": ["litigation"], "severity": "high"}])
+    engine.build_watchlist([
+        dict(make_borrower("借款人甲", shareholders=["张伟"]), executives=[{"name": "李娜", "position": "董事"}]),
+        dict(make_borrower("借款人乙", shareholders=["张伟"]), executives=[{"name": "李娜", "position": "总经理"}]),
+    ])
+
+    assert engine.exposed_borrowers("借款人甲") == [("借款人甲", 0)]
+    # 人物本身作为事件实体时仍影响其直接关联的借款人
+    assert sorted(engine.exposed_borrowers("张伟")) == [("借款人乙", 1), ("借款人甲", 1)]
+
+
+def test_unmatched_events_skip_graph_walk():
+    engine = AlertEngine([{"rule_id": "litigation", "event_types": ["litigation"], "severity": "high"}])
+    engine.build_watchlist([make_borrower("借款人甲", upstream=["供应商甲"])])
+    walked = []
+    original = engine.exposed_borrowers
+    engine.exposed_borrowers = lambda entity: walked.append(entity) or original(entity)
+
+    assert engine.process_event({"event_id": 1, "entity": "供应商甲", "type": "financing"}) == []
+    assert walked == []
+    assert len(engine.process_event({"event_id": 2, "entity": "供应商甲", "type": "litigation"})) == 1
+    assert walked == ["供应商甲"]
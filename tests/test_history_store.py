@@ -0,0 +1,120 @@
+import copy
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from history_store import CompanyHistoryStore
+
+
+def make_company(**overrides):
+    company = {
+        "name": "测试企业",
+        "credit_rating": "AA",
+        "risk_level": "low",
+        "shareholders": [{"name": "股东甲", "ratio": "60%"}],
+        "supply_chain": {"upstream": ["供应商甲"], "downstream": ["客户甲"]},
+    }
+    company.update(overrides)
+    return company
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CompanyHistoryStore(str(tmp_path / "history.db"), keyframe_interval=3)
+    yield store
+    store.close()
+
+
+def test_diff_apply_round_trip():
+    old = make_company()
+    new = make_company(credit_rating="A", supply_chain={"upstream": ["供应商乙"], "downstream": ["客户甲"]})
+    del new["risk_level"]
+    new["litigation"] = ["合同纠纷"]
+
+    delta = CompanyHistoryStore._diff(old, new)
+
+    assert [["supply_chain", "upstream"], ["供应商乙"]] in delta["set"]
+    assert ["risk_level"] in delta["unset"]
+    assert not any(path == ["supply_chain", "downstream"] for path, _ in delta["set"])
+    assert CompanyHistoryStore._apply(old, delta) == new
+    assert old == make_company()
+
+
+def test_unchanged_snapshot_is_not_recorded(store):
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert store.record_snapshot(make_company(), t0) == 1
+    assert store.record_snapshot(make_company(), t0 + timedelta(days=1)) is None
+
+
+def test_keyframes_and_as_of_queries(store, tmp_path):
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    ratings = ["AAA", "AA", "A", "BBB", "A", "AA", "AAA"]
+    expected = []
+    for day, rating in enumerate(ratings):
+        company = make_company(credit_rating=rating, risk_level="high" if day % 2 else "low")
+        store.record_snapshot(company, t0 + timedelta(days=day))
+        expected.append(copy.deepcopy(company))
+
+    keyframes = [row[0] for row in store.conn.execute(
+        "SELECT version FROM snapshots WHERE is_keyframe = 1 ORDER BY version"
+    )]
+    assert keyframes == [1, 4, 7]
+
+    # 新建实例，不依赖最新版本缓存
+    reopened = CompanyHistoryStore(str(tmp_path / "history.db"), keyframe_interval=3)
+    for day, company in enumerate(expected):
+        assert reopened.get_snapshot("测试企业", t0 + timedelta(days=day, hours=12)) == company
+    assert reopened.get_snapshot("测试企业", t0 - timedelta(days=1)) is None
+
+    history = reopened.get_history("测试企业", t0 + timedelta(days=2, hours=12), t0 + timedelta(days=4))
+    assert [item["version"] for item in history] == [3, 4, 5]
+    reopened.close()
+
+
+def test_field_history_lists_changes_only(store):
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    store.record_snapshot(make_company(credit_rating="AA"), t0)
+    store.record_snapshot(make_company(credit_rating="AA", risk_level="medium"), t0 + timedelta(days=1))
+    store.record_snapshot(make_company(credit_rating="A", risk_level="medium"), t0 + timedelta(days=2))
+
+    values = [item["value"] for item in store.get_field_history("测试企业", "credit_rating")]
+    assert values == ["AA", "A"]
+
+
+def test_timestamps_with_offsets_are_compared_in_utc(store):
+    store.record_snapshot(make_company(), "2024-01-01T08:00:00+08:00")
+    store.record_snapshot(make_company(credit_rating="A"), "2024-01-01T01:00:00+00:00")
+
+    assert store.get_snapshot("测试企业", "2024-01-01T08:30:00+08:00")["credit_rating"] == "AA"
+    assert store.get_snapshot("测试企业", "2024-01-01T09:00:00+08:00")["credit_rating"] == "A"
+    with pytest.raises(ValueError):
+        store.record_snapshot(make_company(credit_rating="BBB"), "2024-01-01T08:30:00+08:00")
+
+
+def test_two_instances_on_one_file_stay_consistent(store, tmp_path):
+    other = CompanyHistoryStore(str(tmp_path / "history.db"), keyframe_interval=3)
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    # 两个实例交替写入，各自缓存的最新版本都会过期
+    assert store.record_snapshot(make_company(credit_rating="AA"), t0) == 1
+    assert other.record_snapshot(make_company(credit_rating="A"), t0 + timedelta(days=1)) == 2
+    assert store.record_snapshot(make_company(credit_rating="BBB"), t0 + timedelta(days=2)) == 3
+    # 与另一实例写入的最新版本相同，不应重复记录
+    assert other.record_snapshot(make_company(credit_rating="BBB"), t0 + timedelta(days=3)) is None
+    assert other.record_snapshot(make_company(credit_rating="BBB", risk_level="high"),
+                                 t0 + timedelta(days=3)) == 4
+
+    values = [item["value"] for item in store.get_field_history("测试企业", "credit_rating")]
+    assert values == ["AA", "A", "BBB"]
+    assert store.get_snapshot("测试企业") == make_company(credit_rating="BBB", risk_level="high")
+    other.close()
+
+
+def test_failed_write_rolls_back(store):
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    store.record_snapshot(make_company(), t0)
+    with pytest.raises(ValueError):
+        store.record_snapshot(make_company(credit_rating="A"), t0 - timedelta(days=1))
+
+    assert not store.conn.in_transaction
+    assert store.record_snapshot(make_company(credit_rating="A"), t0 + timedelta(days=1)) == 2
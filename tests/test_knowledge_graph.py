@@ -0,0 +1,159 @@
+import json
+import threading
+import time
+from collections import Counter
+
+from data_processor import DataProcessor
+from knowledge_graph import KnowledgeGraphBuilder, summarize_graph
+
+
+def build_both_formats(company_data):
+    builder = KnowledgeGraphBuilder()
+    vis_data = builder.build_knowledge_graph(company_data)
+    compact_data = builder.build_knowledge_graph(company_data, compact=True)
+    return builder, vis_data, compact_data
+
+
+def test_summarize_graph_matches_for_both_formats():
+    for company_name in ["华为技术有限公司", "腾讯科技有限公司", "未知企业"]:
+        company_data = DataProcessor().get_company_data(company_name)
+        _, vis_data, compact_data = build_both_formats(company_data)
+        assert summarize_graph(vis_data) == summarize_graph(compact_data)
+
+    summary = summarize_graph(compact_data)
+    assert summary == {"group_counts": {"company": 1}, "supply_chain_edges": 0}
+
+
+def test_compact_format_round_trips_nodes_and_edges():
+    company_data = DataProcessor().get_company_data("华为技术有限公司")
+    _, vis_data, compact_data = build_both_formats(company_data)
+    strings = compact_data["tooltips"]["strings"]
+
+    assert compact_data["ids"] == [node["id"] for node in vis_data["nodes"]]
+    for pos, node in enumerate(vis_data["nodes"]):
+        style = compact_data["node_styles"][compact_data["node_style"][pos]]
+        assert (style["group"], style["size"], style["color"]) == (node["group"], node["size"], node["color"])
+        assert strings[compact_data["tooltips"]["nodes"][pos]] == node["title"]
+
+    ids = compact_data["ids"]
+    edges = [(ids[s], ids[t]) for s, t in zip(compact_data["sources"], compact_data["targets"])]
+    assert edges == [(edge["from"], edge["to"]) for edge in vis_data["edges"]]
+    for pos, edge in enumerate(vis_data["edges"]):
+        assert strings[compact_data["tooltips"]["edges"][pos]] == edge["title"]
+
+
+def test_compact_html_escapes_script_close_tags():
+    company_data = DataProcessor().get_company_data("测试企业</script><script>alert(1)</script>")
+    company_data["supply_chain"] = {"upstream": ["供应商</script>"], "downstream": []}
+    builder = KnowledgeGraphBuilder()
+    compact_data = builder.build_knowledge_graph(company_data, compact=True)
+
+    html = builder.create_interactive_graph(compact_data, company_data["name"])
+
+    assert "</script><script>alert(1)" not in html
+    # 仅模板自身的三个 <script> 标签被闭合
+    assert html.count("</script>") == 3
+    payload = html[html.index("var data = ") + len("var data = "):html.index(";\n", html.index("var data = "))]
+    assert json.loads(payload)["ids"][0] == company_data["name"]
+
+
+def make_company(name, upstream=(), shareholders=(), executives=()):
+    return {
+        "name": name,
+        "shareholders": [{"name": shareholder, "ratio": "10%"} for shareholder in shareholders],
+        "executives": [{"name": executive, "position": "董事"} for executive in executives],
+        "supply_chain": {"upstream": list(upstream), "downstream": []},
+    }
+
+
+class FakeFetcher:
+    """按名称返回预置企业数据并记录调用次数"""
+
+    def __init__(self, companies, delay=0.0, failing=()):
+        self.companies = {company["name"]: company for company in companies}
+        self.delay = delay
+        self.failing = set(failing)
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def __call__(self, name):
+        with self.lock:
+            self.calls[name] += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if name in self.failing:
+            raise RuntimeError("接口超时")
+        return self.companies.get(name, make_company(name))
+
+
+def test_depth_one_does_not_fetch():
+    center = make_company("中心公司", upstream=["供应商甲公司"])
+    fetcher = FakeFetcher([])
+
+    expanded = KnowledgeGraphBuilder().build_knowledge_graph(center, depth=1, fetch_company=fetcher)
+
+    assert expanded == KnowledgeGraphBuilder().build_knowledge_graph(center)
+    assert not fetcher.calls
+
+
+def test_expansion_fetches_each_entity_once():
+    # 两家供应商共用同一上游，多跳扩展时上游只获取一次
+    fetcher = FakeFetcher([
+        make_company("甲公司", upstream=["共同上游公司"]),
+        make_company("乙公司", upstream=["共同上游公司"]),
+        make_company("共同上游公司", upstream=["更上游公司"]),
+    ])
+    builder = KnowledgeGraphBuilder()
+    builder.build_knowledge_graph(make_company("中心公司", upstream=["甲公司", "乙公司"]),
+                                  depth=4, fetch_company=fetcher)
+
+    assert builder.graph.has_edge("共同上游公司", "更上游公司")
+    assert max(fetcher.calls.values()) == 1
+    assert "中心公司" not in fetcher.calls
+
+
+def test_expansion_respects_node_budget():
+    fetcher = FakeFetcher([
+        make_company(f"供应商{i}公司", upstream=[f"供应商{i}-{j}公司" for j in range(10)])
+        for i in range(10)
+    ])
+    builder = KnowledgeGraphBuilder(max_nodes=30)
+    builder.build_knowledge_graph(make_company("中心公司", upstream=[f"供应商{i}公司" for i in range(10)]),
+                                  depth=3, fetch_company=fetcher)
+
+    assert builder.graph.number_of_nodes() <= 30
+
+
+def test_expansion_stops_at_deadline():
+    fetcher = FakeFetcher([], delay=1.0)
+    builder = KnowledgeGraphBuilder(deadline_seconds=0.1)
+
+    start = time.monotonic()
+    builder.build_knowledge_graph(make_company("中心公司", upstream=["慢速供应商公司"]),
+                                  depth=2, fetch_company=fetcher)
+
+    assert time.monotonic() - start < 0.5
+    assert set(builder.graph.nodes) == {"中心公司", "慢速供应商公司"}
+
+
+def test_failed_fetch_is_skipped():
+    fetcher = FakeFetcher([make_company("正常供应商公司", upstream=["二级供应商公司"])],
+                          failing=["故障供应商公司"])
+    builder = KnowledgeGraphBuilder()
+    builder.build_knowledge_graph(make_company("中心公司", upstream=["故障供应商公司", "正常供应商公司"]),
+                                  depth=2, fetch_company=fetcher)
+
+    assert builder.graph.has_edge("正常供应商公司", "二级供应商公司")
+    assert fetcher.calls["故障供应商公司"] == 1
+
+
+def test_person_shareholders_and_executives_are_not_expanded():
+    fetcher = FakeFetcher([])
+    builder = KnowledgeGraphBuilder()
+    builder.build_knowledge_graph(
+        make_company("中心公司", shareholders=["MIH TC Holdings Limited", "马化腾"], executives=["刘炽平"]),
+        depth=2, fetch_company=fetcher
+    )
+
+    assert set(fetcher.calls) == {"MIH TC Holdings Limited"}
+    assert builder.graph.nodes["马化腾"]["group"] == "shareholder"
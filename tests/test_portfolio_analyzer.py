@@ -0,0 +1,79 @@
+import random
+
+import numpy as np
+import pytest
+
+from portfolio_analyzer import PortfolioAnalyzer
+
+
+def make_borrower(name, upstream=(), downstream=(), shareholders=()):
+    return {
+        "name": name,
+        "shareholders": [{"name": shareholder, "ratio": "10%"} for shareholder in shareholders],
+        "supply_chain": {"upstream": list(upstream), "downstream": list(downstream)},
+    }
+
+
+PORTFOLIO = [
+    make_borrower("甲", upstream=["供应商A", "供应商B"], shareholders=["股东X"]),
+    make_borrower("乙", upstream=["供应商A"], downstream=["客户C"]),
+    make_borrower("丙", upstream=["供应商A", "供应商B"], downstream=["客户C"]),
+    make_borrower("丁", downstream=["客户D"]),
+]
+
+
+def test_hhi_and_shared_counterparties():
+    result = PortfolioAnalyzer().analyze_concentration(PORTFOLIO, {"甲": 100, "乙": 50, "丙": 30, "丁": 20})
+
+    # 关联方敞口：A=180, B=130, C=80, D=20, X=100
+    exposure = np.array([180, 130, 80, 20, 100], dtype=float)
+    shares = exposure / exposure.sum()
+    assert result["hhi"] == round(float(np.dot(shares, shares)), 4)
+
+    top = [(item["name"], item["borrowers"], item["exposure"]) for item in result["top_counterparties"]]
+    assert top == [("供应商A", 3, 180.0), ("供应商B", 2, 130.0), ("客户C", 2, 80.0)]
+    assert result["top_counterparties"][0]["share"] == 0.9
+
+
+def test_missing_exposures_default_to_zero_when_map_is_given():
+    analyzer = PortfolioAnalyzer()
+    analyzer.build_exposure_matrix(PORTFOLIO, {"甲": 100})
+    assert analyzer.exposures.tolist() == [100.0, 0.0, 0.0, 0.0]
+
+    analyzer.build_exposure_matrix(PORTFOLIO)
+    assert analyzer.exposures.tolist() == [1.0, 1.0, 1.0, 1.0]
+
+
+def test_duplicate_counterparty_counts_once():
+    analyzer = PortfolioAnalyzer()
+    matrix = analyzer.build_exposure_matrix([make_borrower("甲", upstream=["同一方"], shareholders=["同一方"])])
+    assert matrix.toarray().tolist() == [[1.0]]
+
+
+def test_overlap_matches_brute_force():
+    rng = random.Random(7)
+    names = [f"关联方{i}" for i in range(30)]
+    companies = [
+        make_borrower(f"借款人{i}", upstream=rng.sample(names, 3), shareholders=rng.sample(names, 2))
+        for i in range(60)
+    ]
+    exposures = {company["name"]: rng.uniform(1, 100) for company in companies}
+
+    analyzer = PortfolioAnalyzer()
+    result = analyzer.analyze_concentration(companies, exposures, top_n=len(companies))
+
+    counterparties = [set(analyzer._iter_counterparties(company)) for company in companies]
+    expected = {}
+    for i, company in enumerate(companies):
+        overlap = sum(
+            len(counterparties[i] & counterparties[j]) * exposures[other["name"]]
+            for j, other in enumerate(companies) if j != i
+        )
+        if overlap > 0:
+            expected[company["name"]] = overlap
+
+    actual = {item["name"]: item["overlap_exposure"] for item in result["top_overlapping_borrowers"]}
+    assert actual.keys() == expected.keys()
+    for name, overlap in expected.items():
+        assert actual[name] == pytest.approx(overlap)
+    assert [item["overlap_exposure"] for item in result["top_overlapping_borrowers"]] == sorted(actual.values(), reverse=True)
@@ -0,0 +1,70 @@
+import random
+import warnings
+
+from similarity_search import SimilarCompanySearch
+
+
+def make_corpus(size, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"企业{i}",
+            "industry": rng.choice(SimilarCompanySearch.INDUSTRIES),
+            "scale": rng.choice(["大型企业", "中型企业", "小型企业"]),
+            "credit_rating": rng.choice(["AAA", "AA", "A", "BBB", "BB"]),
+            "risk_level": rng.choice(["low", "medium", "high"]),
+            "establish_years": rng.randint(1, 50),
+            "shareholders": [{"name": "股东"}] * rng.randint(0, 5),
+            "executives": [{"name": "高管"}] * rng.randint(0, 5),
+            "subsidiaries": ["子公司"] * rng.randint(0, 20),
+            "supply_chain": {
+                "upstream": ["供应商"] * rng.randint(0, 10),
+                "downstream": ["客户"] * rng.randint(0, 10),
+            },
+        }
+        for i in range(size)
+    ]
+
+
+def scores(results):
+    return [item["similarity"] for item in results]
+
+
+def test_partitioned_search_with_all_partitions_matches_exact():
+    corpus = make_corpus(2000)
+    search = SimilarCompanySearch(exact_threshold=100, n_lists=16, n_probe=16)
+    search.build_index(corpus)
+    assert search.centroids is not None
+
+    for query in corpus[:50]:
+        # 相似度并列时名称顺序可能不同，比较得分序列
+        assert scores(search.search(query, top_k=10)) == scores(search.search(query, top_k=10, exact=True))
+
+
+def test_partitioned_search_recall():
+    corpus = make_corpus(5000, seed=1)
+    search = SimilarCompanySearch(exact_threshold=100, n_lists=64, n_probe=8)
+    search.build_index(corpus)
+
+    hits = 0
+    for query in corpus[:100]:
+        exact = search.search(query, top_k=10, exact=True)
+        approx = search.search(query, top_k=10)
+        threshold = exact[-1]["similarity"]
+        hits += sum(1 for item in approx if item["similarity"] >= threshold)
+    assert hits / 1000 >= 0.9
+
+
+def test_search_excludes_query_company():
+    corpus = make_corpus(50)
+    search = SimilarCompanySearch()
+    search.build_index(corpus)
+    assert all(item["name"] != "企业0" for item in search.search(corpus[0], top_k=10))
+
+
+def test_empty_index_returns_no_results():
+    search = SimilarCompanySearch()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        search.build_index([])
+        assert search.search(make_corpus(1)[0]) == []